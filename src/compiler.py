@@ -6,15 +6,33 @@ code generation.
 Author: Laura Beltrán & Santiago Sánchez
 """
 
+import os
+import re
+
 from lexer import LexicalAnalyzer
 from syntactic import SyntacticAnalyzer
 from semantic import SemanticAnalyzer
+from sharding import partition_scenes
+
+# Written into every sharded page, so a later compilation only removes pages it created
+SHARDED_PAGE_MARKER = "<meta name='generator' content='Interactive Story Compiler (sharded page)'>"
 
 
 class Compiler:
     """This class represents the behavior of the Interactive Story Compiler."""
 
-    def compile(self, code: str, output_file: str = "output.html"):
+    def compile(self, code: str, output_file: str = "output.html", max_scenes_per_page: int = None):
+        story_structure = self.analyze(code)
+
+        # Phase 4: Code Generation (HTML)
+        if max_scenes_per_page is None:
+            self.generate_html(story_structure, output_file)
+        else:
+            self.generate_sharded_html(story_structure, output_file, max_scenes_per_page)
+        print(f"Compilation completed! Output written to '{output_file}'")
+
+    def analyze(self, code: str):
+        """Runs the analysis phases and returns the validated story structure."""
         # Phase 1: Lexical Analysis
         lexer = LexicalAnalyzer()
         tokens = lexer.lex(code)
@@ -25,16 +43,105 @@ class Compiler:
 
         # Phase 3: Semantic Analysis
         semantic = SemanticAnalyzer(tokens)
-        story_structure = semantic.analyze()
-
-        # Phase 4: Code Generation (HTML)
-        self.generate_html(story_structure, output_file)
-        print(f"Compilation completed! Output written to '{output_file}'")
+        return semantic.analyze()
 
     def generate_html(self, story, output_file):
-        html = ["<!DOCTYPE html>", "<html>", "<head>",
+        html = self._html_head("Interactive Story")
+
+        for scene_id, content in story.items():
+            html.extend(self._scene_html(scene_id, content))
+
+        # Start the first scene active
+        html.append("<script>showScene('START');</script>")
+
+        html.extend(["</body>", "</html>"])
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(html))
+
+    def generate_sharded_html(self, story, output_file, max_scenes_per_page):
+        """Writes the story as several small pages plus an index page at output_file."""
+        pages = partition_scenes(story, max_scenes_per_page)
+
+        output_dir = os.path.dirname(output_file)
+        stem = os.path.splitext(os.path.basename(output_file))[0]
+        page_files = [f"{stem}_{number}.html" for number in range(1, len(pages) + 1)]
+        page_of = {
+            scene_id: page_file
+            for page_file, scene_ids in zip(page_files, pages)
+            for scene_id in scene_ids
+        }
+
+        # Remove pages left over from a previous compilation with more pages. Pages that
+        # will be rewritten are skipped, as are files this compiler did not write.
+        stale_page = re.compile(rf"{re.escape(stem)}_(\d+)\.html")
+        for name in os.listdir(output_dir or "."):
+            match = stale_page.fullmatch(name)
+            if match is None or int(match.group(1)) <= len(pages):
+                continue
+            path = os.path.join(output_dir, name)
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                written_by_compiler = SHARDED_PAGE_MARKER in f.read()
+            if written_by_compiler:
+                os.remove(path)
+
+        for page_file, scene_ids in zip(page_files, pages):
+            html = self._html_head("Interactive Story", SHARDED_PAGE_MARKER)
+            for scene_id in scene_ids:
+                html.extend(self._scene_html(scene_id, story[scene_id], page_file, page_of))
+
+            # Open the scene named in the URL fragment if it is on this page, else the first one
+            html.append("<script>")
+            html.append("const requested = location.hash.slice(1);")
+            html.append(f"showScene(requested && document.getElementById(requested) ? requested : '{scene_ids[0]}');")
+            html.append("</script>")
+            html.extend(["</body>", "</html>"])
+
+            with open(os.path.join(output_dir, page_file), "w", encoding="utf-8") as f:
+                f.write("\n".join(html))
+
+        # Index page: entry point to the story and a table of contents of every page
+        html = self._html_head("Interactive Story - Index")
+        html.append("<div class='scene active'>")
+        html.append("<h2>Interactive Story</h2>")
+        html.append(f"<p>{len(story)} scenes in {len(pages)} pages.</p>")
+        html.append("<div class='button-group'>")
+        html.append(f"<button onclick=\"location.href='{page_of['START']}#START'\">Begin</button>")
+        html.append("</div>")
+        for page_file, scene_ids in zip(page_files, pages):
+            html.append(f"<p><a href='{page_file}#{scene_ids[0]}'>{page_file}</a>: "
+                        f"{scene_ids[0]} and {len(scene_ids) - 1} more</p>")
+        html.append("</div>")
+        html.extend(["</body>", "</html>"])
+
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(html))
+
+        return page_files
+
+    def _scene_html(self, scene_id, content, current_page=None, page_of=None):
+        """Builds the markup of one scene. Choices leading to another page become links."""
+        html = [f"<div class='scene' id='{scene_id}'>",
+                f"<h2>{scene_id}</h2>",
+                f"<p>{content['text']}</p>"]
+        if content['choices']:
+            html.append("<div class='button-group'>")
+            for choice in content['choices']:
+                destination = choice['destination']
+                if page_of is not None and page_of[destination] != current_page:
+                    action = f"location.href='{page_of[destination]}#{destination}'"
+                else:
+                    action = f"showScene('{destination}')"
+                html.append(f"<button onclick=\"{action}\">{choice['text']}</button>")
+            html.append("</div>")
+        html.append("</div>")
+        return html
+
+    def _html_head(self, title, *extra_meta):
+        return ["<!DOCTYPE html>", "<html>", "<head>",
                 "<meta charset='UTF-8'>",
-                "<title>Interactive Story</title>",
+                *extra_meta,
+                f"<title>{title}</title>",
                 "<style>",
                 """
                     body {
@@ -108,25 +215,3 @@ class Compiler:
                 """,
                 "</script>",
                 "</head>", "<body>"]
-
-        for scene_id, content in story.items():
-            html.append(f"<div class='scene' id='{scene_id}'>")
-            html.append(f"<h2>{scene_id}</h2>")
-            html.append(f"<p>{content['text']}</p>")
-            if content['choices']:
-                html.append("<div class='button-group'>")
-                for choice in content['choices']:
-                    html.append(
-                        f"<button onclick=\"showScene('{choice['destination']}')\">{choice['text']}</button>"
-                    )
-                html.append("</div>")
-            html.append("</div>")
-
-        # Start the first scene active
-        html.append("<script>showScene('START');</script>")
-
-        html.extend(["</body>", "</html>"])
-
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write("\n".join(html))
-
@@ -4,6 +4,8 @@ You can choose to:
 1. Compile story.txt
 2. Run example_story_1
 3. Run example_story_2
+4. Compile story.txt into sharded pages
+5. Simulate playthroughs of story.txt
 """
 
 from compiler import Compiler
@@ -49,6 +51,39 @@ def example_story_2(compiler_: Compiler):
     """
     compiler_.compile(input_text)
 
+def _print_playthroughs(result):
+    """Prints ending probabilities, unfinished share and mean length of a simulation result."""
+    for scene_id, probability in sorted(result["endings"].items(), key=lambda item: -item[1]):
+        print(f"  {scene_id}: {probability:.2%}")
+    print(f"  Unfinished: {result['unfinished']:.2%}")
+    if result["mean_length"] is None:
+        print("  Mean length: no reader reaches an ending")
+    else:
+        print(f"  Mean length: {result['mean_length']:.2f} choices")
+
+def simulate_story(compiler_: Compiler, code: str):
+    """Estimates ending probabilities and playthrough lengths of a story."""
+    try:
+        from simulator import PlaythroughSimulator
+    except ImportError:
+        print("NumPy is required for simulation. Install it with: pip install numpy")
+        return
+
+    story = compiler_.analyze(code)
+
+    simulator = PlaythroughSimulator(story)
+    result = simulator.simulate()
+    print(f"Simulated {result['readers']} readers choosing uniformly at random:")
+    _print_playthroughs(result)
+
+    try:
+        exact = simulator.exact()
+    except ValueError as error:
+        print(f"Exact solution skipped: {error}")
+    else:
+        print("Exact solution:")
+        _print_playthroughs(exact)
+
 if __name__ == "__main__":
     compiler = Compiler()
 
@@ -57,14 +92,25 @@ if __name__ == "__main__":
     print("1. Compile from story.txt")
     print("2. Run example_story_1")
     print("3. Run example_story_2")
+    print("4. Compile from story.txt into sharded pages")
+    print("5. Simulate playthroughs of story.txt")
 
-    option = input("Enter 1, 2 or 3: ").strip()
+    option = input("Enter 1, 2, 3, 4 or 5: ").strip()
 
-    if option == "1":
+    if option in ("1", "4", "5"):
         try:
             with open("src/story.txt", "r", encoding="utf-8") as f:
                 code = f.read()
-            compiler.compile(code)
+            if option == "1":
+                compiler.compile(code)
+            elif option == "5":
+                simulate_story(compiler, code)
+            else:
+                size = input("Maximum scenes per page: ").strip()
+                if size.isdigit() and int(size) > 0:
+                    compiler.compile(code, max_scenes_per_page=int(size))
+                else:
+                    print("Invalid page size. It must be a positive whole number. Exiting.")
         except FileNotFoundError:
             print("story.txt not found.")
     elif option == "2":
@@ -79,16 +79,15 @@ class SemanticAnalyzer:
             for scene, data in self.scenes.items()
         }
 
-        reachable = set()
-
-        def dfs(scene_id):
-            if scene_id in reachable:
-                return
-            reachable.add(scene_id)
+        # Iterative DFS so very long stories do not hit the recursion limit
+        reachable = {"START"}
+        pending = ["START"]
+        while pending:
+            scene_id = pending.pop()
             for neighbor in graph.get(scene_id, []):
-                dfs(neighbor)
-
-        dfs("START")
+                if neighbor not in reachable:
+                    reachable.add(neighbor)
+                    pending.append(neighbor)
 
         unreachable = self.defined_scene_ids - reachable
         if unreachable:
@@ -0,0 +1,100 @@
+"""
+This module partitions a validated story into pages for the sharded HTML output. Scenes are
+grouped by strongly connected region of the scene graph (scenes that can reach each other)
+and packed into pages under a size budget, so most transitions stay within a single page.
+
+Author: Laura Beltrán & Santiago Sánchez
+"""
+
+
+def strongly_connected_regions(story, start="START"):
+    """Returns the strongly connected regions of the scene graph, in story order from START."""
+    graph = {
+        scene: [choice["destination"] for choice in data["choices"]]
+        for scene, data in story.items()
+    }
+
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    regions = []
+    counter = 0
+
+    roots = [start] if start in graph else []
+    roots += [scene for scene in graph if scene != start]
+
+    for root in roots:
+        if root in index:
+            continue
+
+        # Iterative Tarjan so very long stories do not hit the recursion limit
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+
+        while work:
+            scene_id, neighbors = work[-1]
+            advanced = False
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = lowlink[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(graph[neighbor])))
+                    advanced = True
+                    break
+                if neighbor in on_stack:
+                    lowlink[scene_id] = min(lowlink[scene_id], index[neighbor])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[scene_id])
+
+            if lowlink[scene_id] == index[scene_id]:
+                region = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    region.append(member)
+                    if member == scene_id:
+                        break
+                # Keep the members in the order they were discovered
+                region.sort(key=index.get)
+                regions.append(region)
+
+    # Tarjan emits regions in reverse topological order
+    regions.reverse()
+    return regions
+
+
+def partition_scenes(story, max_scenes_per_page):
+    """Packs the scenes into pages of at most max_scenes_per_page scenes each."""
+    if max_scenes_per_page < 1:
+        raise ValueError("max_scenes_per_page must be at least 1")
+
+    pages = []
+    current = []
+
+    for region in strongly_connected_regions(story):
+        if len(current) + len(region) > max_scenes_per_page and current:
+            pages.append(current)
+            current = []
+
+        # A region larger than the budget is split across consecutive pages
+        while len(region) > max_scenes_per_page:
+            pages.append(region[:max_scenes_per_page])
+            region = region[max_scenes_per_page:]
+
+        current.extend(region)
+
+    if current:
+        pages.append(current)
+
+    return pages
@@ -0,0 +1,188 @@
+"""
+This module estimates how readers play through a validated story. Each scene is a state of a
+Markov chain and each choice a transition; scenes without choices are endings (absorbing states).
+Readers are simulated in batched NumPy arrays, and small stories can also be solved exactly.
+
+Requires NumPy.
+
+Author: Laura Beltrán & Santiago Sánchez
+"""
+
+import numpy as np
+
+
+class PlaythroughSimulator:
+    """Monte Carlo and exact playthrough analysis over the scenes returned by SemanticAnalyzer."""
+
+    def __init__(self, story, weights=None, start="START"):
+        """
+        story: scene dictionary returned by SemanticAnalyzer.analyze().
+        weights: optional {scene_id: [weight per choice]}; scenes not listed pick uniformly.
+        """
+        self.scene_ids = list(story)
+        self.position = {scene_id: i for i, scene_id in enumerate(self.scene_ids)}
+        if start not in self.position:
+            raise ValueError(f"Unknown start scene: {start}")
+        self.start = self.position[start]
+        weights = weights or {}
+
+        unknown = set(weights) - set(story)
+        if unknown:
+            raise ValueError(f"Weights given for undefined scenes: {unknown}")
+
+        # Sparse transition matrix in CSR form: row i holds the choices of scene i
+        indptr = [0]
+        indices = []
+        probabilities = []
+        for scene_id in self.scene_ids:
+            choices = story[scene_id]["choices"]
+            row = weights.get(scene_id, [1.0] * len(choices))
+            if len(row) != len(choices):
+                raise ValueError(f"Scene {scene_id} has {len(choices)} choices but {len(row)} weights")
+            row = np.asarray(row, dtype=np.float64)
+            if choices and (not np.all(np.isfinite(row)) or np.any(row < 0) or row.sum() <= 0):
+                raise ValueError(f"Weights of scene {scene_id} must be finite and non-negative with a positive sum")
+
+            indices.extend(self.position[choice["destination"]] for choice in choices)
+            probabilities.extend(row / row.sum() if choices else [])
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.is_ending = np.diff(self.indptr) == 0
+
+        # Sampling keys: row number plus the cumulative probability within the row. The keys
+        # increase across the whole matrix, so one searchsorted picks a choice for every reader.
+        rows = np.repeat(np.arange(len(self.scene_ids)), np.diff(self.indptr))
+        cumulative = np.cumsum(self.probabilities)
+        row_offsets = np.concatenate(([0.0], cumulative))[self.indptr[:-1]]
+        within_row = cumulative - row_offsets[rows]
+        within_row[within_row >= 1.0 - 1e-12] = 1.0
+        self._keys = rows + within_row
+
+    def simulate(self, readers=1_000_000, max_steps=1000, batch_size=250_000, seed=None):
+        """
+        Simulates readers choosing at random until they reach an ending or max_steps choices.
+        Returns ending probabilities, the share of unfinished readers and the length distribution.
+        """
+        if readers < 1:
+            raise ValueError("readers must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if max_steps < 0:
+            raise ValueError("max_steps must be non-negative")
+
+        rng = np.random.default_rng(seed)
+        n_scenes = len(self.scene_ids)
+        ending_counts = np.zeros(n_scenes, dtype=np.int64)
+        length_counts = np.zeros(max_steps + 1, dtype=np.int64)
+        unfinished = 0
+
+        remaining = readers
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            remaining -= size
+
+            state = np.full(size, self.start, dtype=np.int64)
+            lengths = np.zeros(size, dtype=np.int64)
+            alive = np.flatnonzero(~self.is_ending[state])
+
+            for step in range(1, max_steps + 1):
+                if alive.size == 0:
+                    break
+                current = state[alive]
+                picks = np.searchsorted(self._keys, current + rng.random(alive.size), side="right")
+                picks = np.clip(picks, self.indptr[current], self.indptr[current + 1] - 1)
+                state[alive] = self.indices[picks]
+
+                done = self.is_ending[state[alive]]
+                lengths[alive[done]] = step
+                alive = alive[~done]
+
+            finished = self.is_ending[state]
+            ending_counts += np.bincount(state[finished], minlength=n_scenes)
+            length_counts += np.bincount(lengths[finished], minlength=max_steps + 1)
+            unfinished += size - int(finished.sum())
+
+        finished_total = readers - unfinished
+        steps = np.arange(max_steps + 1)
+        return {
+            "readers": readers,
+            "endings": {
+                self.scene_ids[i]: float(ending_counts[i] / readers)
+                for i in np.flatnonzero(self.is_ending)
+            },
+            "unfinished": unfinished / readers,
+            "mean_length": float(steps @ length_counts) / finished_total if finished_total else None,
+            "length_histogram": {int(k): int(length_counts[k]) for k in np.flatnonzero(length_counts)},
+        }
+
+    def exact(self, max_scenes=2000):
+        """
+        Solves the absorbing Markov chain exactly with a dense linear solve (small stories only).
+        Scenes that can never reach an ending count as unfinished; mean_length is the expected
+        number of choices of the readers who do reach an ending.
+        """
+        n_scenes = len(self.scene_ids)
+        if n_scenes > max_scenes:
+            raise ValueError(f"Story has {n_scenes} scenes; exact solve is limited to {max_scenes}")
+
+        endings = np.flatnonzero(self.is_ending)
+        if self.is_ending[self.start]:
+            return {
+                "endings": {self.scene_ids[i]: float(i == self.start) for i in endings},
+                "unfinished": 0.0,
+                "mean_length": 0.0,
+            }
+
+        # Scenes that can reach an ending, found by walking the choices backwards.
+        # Choices with zero weight are never taken, so they are not a way out.
+        taken = self.probabilities > 0
+        rows = np.repeat(np.arange(n_scenes), np.diff(self.indptr))[taken]
+        destinations = self.indices[taken]
+        probabilities = self.probabilities[taken]
+        can_end = self.is_ending.copy()
+        changed = True
+        while changed:
+            reached = np.zeros(n_scenes, dtype=bool)
+            reached[rows[can_end[destinations]]] = True
+            changed = bool(np.any(reached & ~can_end))
+            can_end |= reached
+
+        transient = np.flatnonzero(can_end & ~self.is_ending)
+        if self.start not in transient:
+            return {
+                "endings": {self.scene_ids[i]: 0.0 for i in endings},
+                "unfinished": 1.0,
+                "mean_length": None,
+            }
+        order = np.full(n_scenes, -1, dtype=np.int64)
+        order[transient] = np.arange(transient.size)
+        ending_column = np.full(n_scenes, -1, dtype=np.int64)
+        ending_column[endings] = np.arange(endings.size)
+
+        # Q: transient -> transient, R: transient -> ending (transitions into traps are dropped)
+        q = np.zeros((transient.size, transient.size))
+        r = np.zeros((transient.size, endings.size))
+        from_transient = order[rows] >= 0
+        to_transient = from_transient & (order[destinations] >= 0)
+        to_ending = from_transient & self.is_ending[destinations]
+        np.add.at(q, (order[rows[to_transient]], order[destinations[to_transient]]),
+                  probabilities[to_transient])
+        np.add.at(r, (order[rows[to_ending]], ending_column[destinations[to_ending]]),
+                  probabilities[to_ending])
+
+        # Expected visits to each transient scene from START: row START of N = (I - Q)^-1
+        identity = np.eye(transient.size)
+        visits = np.linalg.solve((identity - q).T, identity[order[self.start]])
+        ending_probabilities = visits @ r
+
+        # Probability of finishing from each scene weights the visits of finishing readers only
+        finish = np.linalg.solve(identity - q, r.sum(axis=1))
+        finished = ending_probabilities.sum()
+        return {
+            "endings": {self.scene_ids[i]: float(ending_probabilities[k]) for k, i in enumerate(endings)},
+            "unfinished": float(max(0.0, 1.0 - finished)),
+            "mean_length": float(visits @ finish / finished),
+        }
@@ -3,14 +3,30 @@ These tests check:
 - Valid and invalid tokens (lexer)
 - Valid and incomplete scenarios (parser)
 - References and structures (semantic)
+- Page partitioning and sharded HTML output
+- Playthrough simulation (skipped when NumPy is not installed)
 
 Run: python -m unittest tests/test.py
 '''
 
+import os
+import sys
+import tempfile
 import unittest
+
+# compiler.py imports its sibling modules as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from src.compiler import Compiler
 from src.lexer import LexicalAnalyzer
 from src.syntactic import SyntacticAnalyzer
 from src.semantic import SemanticAnalyzer
+from src.sharding import partition_scenes
+
+try:
+    from src.simulator import PlaythroughSimulator
+except ImportError:
+    PlaythroughSimulator = None
 
 
 class TestInteractiveStoryCompiler(unittest.TestCase):
@@ -108,3 +124,228 @@ class TestInteractiveStoryCompiler(unittest.TestCase):
         with self.assertRaises(Exception) as context:
             semantic.analyze()
         self.assertIn("Undefined scene destinations", str(context.exception))
+
+    def test_sharding_keeps_cycles_together(self):
+        code = '''
+        scene: START
+        text: "Crossroads."
+        choice: "Loop" -> LOOP
+        choice: "Leave" -> END
+
+        scene: LOOP
+        text: "Going in circles."
+        choice: "Back" -> START
+
+        scene: END
+        text: "The end."
+        '''
+        tokens = self.lexer.lex(code)
+        scenes = SemanticAnalyzer(tokens).analyze()
+        pages = partition_scenes(scenes, 2)
+        self.assertEqual(pages, [["START", "LOOP"], ["END"]])
+
+    def test_sharding_splits_large_regions(self):
+        code = '''
+        scene: START
+        text: "One."
+        choice: "Next" -> TWO
+
+        scene: TWO
+        text: "Two."
+        choice: "Next" -> THREE
+
+        scene: THREE
+        text: "Three."
+        choice: "Back" -> START
+        '''
+        tokens = self.lexer.lex(code)
+        scenes = SemanticAnalyzer(tokens).analyze()
+        pages = partition_scenes(scenes, 2)
+        self.assertEqual(pages, [["START", "TWO"], ["THREE"]])
+        with self.assertRaises(ValueError):
+            partition_scenes(scenes, 0)
+
+    def test_generate_html_output_unchanged(self):
+        code = '''
+        scene: START
+        text: "You wake up in a dark cave."
+        choice: "Go left" -> DRAGON
+        choice: "Go right" -> EXIT
+
+        scene: DRAGON
+        text: "A dragon appears!"
+        choice: "Fight" -> END
+        choice: "Run away" -> EXIT
+
+        scene: EXIT
+        text: "You found the way out."
+
+        scene: END
+        text: "The dragon devours you."
+        '''
+        tokens = self.lexer.lex(code)
+        scenes = SemanticAnalyzer(tokens).analyze()
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "output.html")
+            Compiler().generate_html(scenes, output_file)
+            with open(output_file, encoding="utf-8") as f:
+                html = f.read()
+        self.assertIn("<title>Interactive Story</title>", html)
+        self.assertIn("<div class='scene' id='DRAGON'>\n<h2>DRAGON</h2>\n<p>A dragon appears!</p>", html)
+        self.assertIn("<button onclick=\"showScene('DRAGON')\">Go left</button>", html)
+        self.assertIn("<button onclick=\"showScene('EXIT')\">Run away</button>", html)
+        self.assertNotIn("location.href", html)
+        self.assertNotIn("name='generator'", html)
+        self.assertTrue(html.endswith("<script>showScene('START');</script>\n</body>\n</html>"))
+
+    def test_generate_sharded_html(self):
+        code = '''
+        scene: START
+        text: "Crossroads."
+        choice: "Loop" -> LOOP
+        choice: "Leave" -> END
+
+        scene: LOOP
+        text: "Going in circles."
+        choice: "Back" -> START
+
+        scene: END
+        text: "The end."
+        '''
+        tokens = self.lexer.lex(code)
+        scenes = SemanticAnalyzer(tokens).analyze()
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "story.html")
+            compiler = Compiler()
+
+            # Files that only look like pages were not written by the compiler and must survive
+            for name in ("story_2024.html", "story_5.html"):
+                with open(os.path.join(tmp, name), "w", encoding="utf-8") as f:
+                    f.write("<p>Hand-made page</p>")
+
+            # A stale page from an earlier run with a smaller budget must be removed
+            compiler.generate_sharded_html(scenes, output_file, 1)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "story_3.html")))
+
+            page_files = compiler.generate_sharded_html(scenes, output_file, 2)
+            self.assertEqual(page_files, ["story_1.html", "story_2.html"])
+            self.assertEqual(sorted(os.listdir(tmp)),
+                             ["story.html", "story_1.html", "story_2.html", "story_2024.html", "story_5.html"])
+
+            with open(os.path.join(tmp, "story_1.html"), encoding="utf-8") as f:
+                first_page = f.read()
+            self.assertIn("<button onclick=\"showScene('LOOP')\">Loop</button>", first_page)
+            self.assertIn("<button onclick=\"location.href='story_2.html#END'\">Leave</button>", first_page)
+            self.assertIn("<button onclick=\"showScene('START')\">Back</button>", first_page)
+            self.assertIn("document.getElementById(requested) ? requested : 'START'", first_page)
+
+            with open(output_file, encoding="utf-8") as f:
+                index = f.read()
+            self.assertIn("location.href='story_1.html#START'", index)
+            self.assertIn("<a href='story_2.html#END'>story_2.html</a>", index)
+
+    def test_semantic_long_chain(self):
+        lines = []
+        for i in range(5000):
+            scene_id = "START" if i == 0 else f"S{i}"
+            lines.append(f'scene: {scene_id}\ntext: "Step {i}."\nchoice: "Next" -> S{i + 1}')
+        lines.append('scene: S5000\ntext: "The end."')
+        tokens = self.lexer.lex("\n".join(lines))
+        scenes = SemanticAnalyzer(tokens).analyze()
+        self.assertEqual(len(scenes), 5001)
+
+    @unittest.skipIf(PlaythroughSimulator is None, "NumPy is not installed")
+    def test_simulator_matches_exact_solve(self):
+        code = '''
+        scene: START
+        text: "You wake up in a dark cave."
+        choice: "Go left" -> DRAGON
+        choice: "Go right" -> EXIT
+
+        scene: DRAGON
+        text: "A dragon appears!"
+        choice: "Fight" -> END
+        choice: "Run away" -> EXIT
+
+        scene: EXIT
+        text: "You found the way out."
+
+        scene: END
+        text: "The dragon devours you."
+        '''
+        tokens = self.lexer.lex(code)
+        scenes = SemanticAnalyzer(tokens).analyze()
+        simulator = PlaythroughSimulator(scenes, weights={"START": [3, 1]})
+
+        exact = simulator.exact()
+        self.assertAlmostEqual(exact["endings"]["EXIT"], 0.625)
+        self.assertAlmostEqual(exact["endings"]["END"], 0.375)
+        self.assertAlmostEqual(exact["mean_length"], 1.75)
+
+        result = simulator.simulate(readers=100_000, seed=0)
+        self.assertEqual(result["unfinished"], 0.0)
+        self.assertAlmostEqual(result["endings"]["EXIT"], 0.625, delta=0.01)
+        self.assertAlmostEqual(result["mean_length"], 1.75, delta=0.01)
+        self.assertEqual(set(result["length_histogram"]), {1, 2})
+
+    @unittest.skipIf(PlaythroughSimulator is None, "NumPy is not installed")
+    def test_simulator_unfinished_loop(self):
+        code = '''
+        scene: START
+        text: "A fork in the road."
+        choice: "Wander" -> LOST
+        choice: "Go home" -> HOME
+
+        scene: LOST
+        text: "You walk in circles."
+        choice: "Keep walking" -> LOST
+
+        scene: HOME
+        text: "You are home."
+        '''
+        tokens = self.lexer.lex(code)
+        scenes = SemanticAnalyzer(tokens).analyze()
+        simulator = PlaythroughSimulator(scenes)
+
+        exact = simulator.exact()
+        self.assertAlmostEqual(exact["unfinished"], 0.5)
+        self.assertAlmostEqual(exact["mean_length"], 1.0)
+
+        result = simulator.simulate(readers=10_000, max_steps=50, seed=0)
+        self.assertAlmostEqual(result["unfinished"], 0.5, delta=0.03)
+
+        # A zero-weight choice is never taken, so it is not a way out of the loop
+        code = '''
+        scene: START
+        text: "A fork in the road."
+        choice: "Wander" -> LOOP
+        choice: "Go home" -> END
+
+        scene: LOOP
+        text: "You walk in circles."
+        choice: "Turn back" -> START
+
+        scene: END
+        text: "You are home."
+        '''
+        tokens = self.lexer.lex(code)
+        scenes = SemanticAnalyzer(tokens).analyze()
+        simulator = PlaythroughSimulator(scenes, weights={"START": [1, 0]})
+
+        exact = simulator.exact()
+        self.assertEqual(exact["unfinished"], 1.0)
+        self.assertEqual(exact["endings"], {"END": 0.0})
+        self.assertIsNone(exact["mean_length"])
+
+        result = simulator.simulate(readers=1_000, max_steps=50, seed=0)
+        self.assertEqual(result["unfinished"], 1.0)
+        self.assertIsNone(result["mean_length"])
+        with self.assertRaises(ValueError):
+            PlaythroughSimulator(scenes, weights={"START": [1]})
+        with self.assertRaises(ValueError):
+            PlaythroughSimulator(scenes, weights={"START": [float("nan"), 1]})
+        with self.assertRaises(ValueError):
+            PlaythroughSimulator(scenes, weights={"START": [float("inf"), 1]})
+        for arguments in ({"readers": 0}, {"batch_size": 0}, {"max_steps": -1}):
+            with self.assertRaises(ValueError):
+                simulator.simulate(**arguments)